@@ -1,52 +1,109 @@
 # app.py
 import streamlit as st
-import matplotlib.pyplot as plt
-import base64, math, uuid, hashlib, hmac
-from scipy.stats import chisquare
+import base64, io, uuid, hashlib, hmac
+import numpy as np
 
-from qrng import generate_random_bits as qrng_bits, example_circuit
+from qrng import generate_random_bytes as qrng_bytes, bits_str, clamp_qubits, example_circuit
 from classical_rng import generate_random_bits as crng_bits
+from bitstats import frequency_test, runs_test, entropy_from_counts, chi_square_from_counts
 
 # ---------- Helpers ----------
-def frequency_test(bits: str):
-    return bits.count("0"), bits.count("1")
-
-def runs_test(bits: str):
-    if not bits: return 0, 0.0
-    runs = 1
-    for i in range(1, len(bits)):
-        if bits[i] != bits[i-1]:
-            runs += 1
-    expected = (2*len(bits)-1)/3
-    return runs, expected
-
-def entropy(bits: str):
-    if not bits: return 0.0
-    c0, c1 = bits.count("0"), bits.count("1")
-    total = len(bits)
-    out = 0.0
-    for c in (c0, c1):
-        if c:
-            p = c/total
-            out -= p*math.log2(p)
-    return out
-
-def chi_square_01(bits: str):
-    zeros, ones = frequency_test(bits)
-    total = len(bits)
-    if total == 0: return 0.0, 1.0
-    chi2, p = chisquare([zeros, ones], f_exp=[total/2, total/2])
-    return float(chi2), float(p)
-
 def bits_to_bytes(bits: str) -> bytes:
     if not bits:
         return b""
-    return int(bits, 2).to_bytes((len(bits) + 7)//8, "big")
+    # Left-pad to whole bytes so the result matches int(bits, 2) big-endian
+    arr = np.frombuffer(bits.encode("ascii"), dtype=np.uint8) - ord("0")
+    pad = -len(bits) % 8
+    if pad:
+        arr = np.concatenate((np.zeros(pad, dtype=np.uint8), arr))
+    return np.packbits(arr).tobytes()
+
+@st.cache_data(max_entries=64)
+def compute_stats(packed: bytes, n_bits: int) -> dict:
+    # Memoized per key, so widget reruns don't rescan the same bits; one popcount feeds
+    # frequency, entropy and chi-square
+    zeros, ones = frequency_test(packed, n_bits)
+    runs, runs_expected = runs_test(packed, n_bits)
+    chi2, p = chi_square_from_counts(zeros, ones)
+    return {"zeros": zeros, "ones": ones, "runs": runs, "runs_expected": runs_expected,
+            "entropy": entropy_from_counts(zeros, ones), "chi2": chi2, "p": p}
+
+def _fig_png(fig) -> bytes:
+    # Same settings st.pyplot uses, done once so reruns only resend the bytes
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=200, bbox_inches="tight")
+    return buf.getvalue()
+
+@st.cache_resource
+def cached_circuit(n: int):
+    # Built once per qubit count (pass clamp_qubits(n)); reruns reuse the same QuantumCircuit
+    return example_circuit(n)
+
+@st.cache_data
+def _circuit_png(n: int):
+    # The mpl draw + savefig is the slow part of the Theory/Simulator pages; cache the PNG
+    # per clamped qubit count. None means fall back to the text drawing.
+    try:
+        fig = cached_circuit(n).draw(output="mpl")
+    except Exception:
+        return None
+    import matplotlib.pyplot as plt
+    png = _fig_png(fig)
+    plt.close(fig)  # qiskit's drawer registers the figure with pyplot
+    return png
+
+# Static figures are rendered to PNG once per process; pyplot-free Figures keep them out
+# of matplotlib's global state and off the shared session threads
+@st.cache_data
+def _home_flow_png() -> bytes:
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(10, 2.2))
+    ax = fig.subplots()
+    steps = ["Quantum Circuit", "Superposition", "Measurement", "Random Bits", "Keys", "Applications"]
+    for i, step in enumerate(steps):
+        ax.text(i*1.5, 0.5, step, ha="center", va="center",
+                bbox=dict(boxstyle="round,pad=0.5", fc="#6ae7ff", alpha=0.28, ec="#6ae7ff"))
+        if i < len(steps) - 1:
+            ax.arrow(i*1.5+0.6, 0.5, 0.8, 0, head_width=0.12, head_length=0.18, fc="white", ec="white", length_includes_head=True)
+    ax.axis("off")
+    return _fig_png(fig)
+
+@st.cache_data
+def _concept_png() -> bytes:
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(6, 2))
+    ax = fig.subplots()
+    labels = ["|0⟩", "H", "Superposition", "Measure", "0/1"]
+    x = [0, 1.2, 3.0, 4.7, 6.2]
+    for i, lab in enumerate(labels):
+        ax.text(x[i], 0.5, lab, ha="center", va="center",
+                bbox=dict(boxstyle="round,pad=0.4", fc="#ff6ad5", alpha=0.28, ec="#ff6ad5"))
+        if i < len(labels)-1:
+            ax.arrow(x[i]+0.5, 0.5, x[i+1]-x[i]-1.0, 0, head_width=0.1, head_length=0.2, fc="white", ec="white", length_includes_head=True)
+    ax.axis("off")
+    return _fig_png(fig)
+
+def _compare_fig(n: int, q0: int, c0: int):
+    # One Figure per session, redrawn in place only when the counts change. Built without
+    # pyplot so it isn't registered globally and is freed with the session.
+    from matplotlib.figure import Figure
+    if "compare_fig" not in st.session_state:
+        fig = Figure()
+        st.session_state.compare_fig, st.session_state.compare_ax = fig, fig.subplots()
+    fig, ax = st.session_state.compare_fig, st.session_state.compare_ax
+    if st.session_state.get("compare_fig_key") != (n, q0, c0):
+        q1, c1 = n - q0, n - c0
+        ax.clear()
+        w = 0.35
+        ax.bar([0-w/2, 1-w/2], [q0/n*100, q1/n*100], w, label="Quantum")
+        ax.bar([0+w/2, 1+w/2], [c0/n*100, c1/n*100], w, label="Classical")
+        ax.set_ylabel("Percentage (%)"); ax.set_title("Distribution of 0s vs 1s"); ax.legend()
+        st.session_state.compare_fig_key = (n, q0, c0)
+    return fig
 
 # ---------- Streamlit config ----------
 st.set_page_config(page_title="QRNG • Quantum Random Number Generator", layout="wide")
 
-# ---------- CSS ----------
 # ---------- CSS ----------
 st.markdown("""
 <style>
@@ -55,23 +112,6 @@ st.markdown("""
     --text:#eaf0f6; --muted:#a9b3c2; --a1:#6ae7ff; --a2:#ff6ad5;
 }
 html,body,.stApp{background:var(--bg);color:var(--text);font-family:"Segoe UI",system-ui,sans-serif;}
-.nav-wrap{position:sticky;top:0;z-index:999;background:linear-gradient(90deg,var(--nav),#0b0c12);
-    border-radius:14px;padding:10px;margin-bottom:18px;box-shadow:0 10px 25px rgba(0,0,0,.35);}
-.nav{display:flex;gap:8px;align-items:center;justify-content:center;flex-wrap:wrap;}
-.nav button{
-    cursor:pointer;position:relative;border:none;padding:10px 16px;border-radius:10px;
-    color:#fff !important;background:#1E90FF !important; /* DodgerBlue */
-    font-weight:600;transition:.2s ease;box-shadow:0 2px 6px rgba(0,0,0,.3);
-}
-.nav button:hover{
-    background:#104E8B !important; /* DarkBlue */
-    color:#fff !important;
-}
-.nav button.active{
-    color:#fff !important;
-    background:linear-gradient(90deg,var(--a1),var(--a2)) !important;
-    box-shadow:0 4px 12px rgba(0,0,0,.4);
-}
 .card{background:var(--glass);border:1px solid rgba(255,255,255,.08);border-radius:16px;padding:22px;
     box-shadow:0 8px 24px rgba(0,0,0,.35);}
 .grid{display:grid;grid-template-columns:repeat(2,minmax(300px,1fr));gap:18px;}
@@ -81,153 +121,50 @@ hr{border:none;border-top:1px solid rgba(255,255,255,.08);margin:16px 0;}
 """, unsafe_allow_html=True)
 
 
-# ---------- Navigation ----------
-PAGES = ["Home","Theory","Simulator","Generator","Compare","Tests","Real-World","FAQ","Contact"]
-if "page" not in st.session_state:
-    st.session_state.page = "Home"
-
-st.markdown('<div class="nav-wrap"><div class="nav">', unsafe_allow_html=True)
-cols = st.columns(len(PAGES))
-for i, p in enumerate(PAGES):
-    if cols[i].button(p, key=f"nav_{p}"):
-        st.session_state.page = p
-st.markdown('</div></div>', unsafe_allow_html=True)
-
-page = st.session_state.page
-
-# ---------- Pages ----------
-# HOME
-if page == "Home":
-    st.markdown("## ⚛️ QRNG — Quantum Random Number Generator")
-    st.caption("Design a basic QRNG using **superposition** (Hadamard) and **measurement** to generate random bits.")
-    st.markdown('<div class="card"><h3>Overview</h3>'
-                '<p>• Generate **quantum random bits** (not algorithmic pseudo-random)<br>'
-                '• Visualize the quantum circuit and core theory<br>'
-                '• Run quick statistical tests (Frequency, Runs, Entropy, Chi-Square)<br>'
-                '• See practical uses: API tokens, HMAC, UUIDs, OTP</p></div>', unsafe_allow_html=True)
-    
-    st.markdown("#### 🔁 Process Flow")
-    fig, ax = plt.subplots(figsize=(10, 2.2))
-    steps = ["Quantum Circuit", "Superposition", "Measurement", "Random Bits", "Keys", "Applications"]
-    for i, step in enumerate(steps):
-        ax.text(i*1.5, 0.5, step, ha="center", va="center",
-                bbox=dict(boxstyle="round,pad=0.5", fc="#6ae7ff", alpha=0.28, ec="#6ae7ff"))
-        if i < len(steps) - 1:
-            ax.arrow(i*1.5+0.6, 0.5, 0.8, 0, head_width=0.12, head_length=0.18, fc="white", ec="white", length_includes_head=True)
-    ax.axis("off")
-    st.pyplot(fig)
-
-    st.markdown('<div class="grid">', unsafe_allow_html=True)
-    c1, c2 = st.columns(2)
-    with c1:
-        st.markdown('<div class="card"><h4>Why Quantum?</h4>'
-                    '<p class="small">Classical RNGs are algorithmic (seeded), hence *pseudo-random*. '
-                    'Quantum randomness is rooted in measurement uncertainty — intrinsically unpredictable.</p></div>',
-                    unsafe_allow_html=True)
-    with c2:
-        st.markdown('<div class="card"><h4>What You Can Show</h4>'
-                    '<p class="small">• Generate keys of 16/32/64/128 bits<br>'
-                    '• Visual circuit & theory<br>'
-                    '• Quick tests proving balance & entropy<br>'
-                    '• Real-world integrations in security workflows</p></div>',
-                    unsafe_allow_html=True)
-
-# THEORY
-elif page == "Theory":
-    st.markdown("## 📚 Theory")
-    left, right = st.columns([1,1], gap="large")
-    with left:
-        st.markdown('<div class="card"><h4>Core Concepts</h4>', unsafe_allow_html=True)
-        st.markdown("""
-        - **Superposition:** Hadamard gate prepares qubits with equal amplitudes → 50/50 outcomes.
-        - **Measurement:** Collapses each qubit to 0 or 1 **unpredictably**.
-        - **Independence:** Apply H on each qubit; measure all; concatenate bits.
-        - **Extractor (prod use):** Optional step to remove bias if needed.
-        """)
-        st.markdown('</div>', unsafe_allow_html=True)
-    
-    with right:
-        st.markdown('<div class="card"><h4>Visualization</h4>', unsafe_allow_html=True)
-        nq = st.slider("Number of qubits (illustration)", 3, 12, 6, key="nq_theory")
-        qc = example_circuit(nq)
-        try:
-            fig = qc.draw(output="mpl")
-            st.pyplot(fig)
-        except Exception:
-            st.code(qc.draw(output="text"), language="text")
-        st.markdown('</div>', unsafe_allow_html=True)
-    
-    st.markdown("#### 🧠 Concept Snapshot")
-    fig2, ax2 = plt.subplots(figsize=(6, 2))
-    labels = ["|0⟩", "H", "Superposition", "Measure", "0/1"]
-    x = [0, 1.2, 3.0, 4.7, 6.2]
-    for i, lab in enumerate(labels):
-        ax2.text(x[i], 0.5, lab, ha="center", va="center",
-                 bbox=dict(boxstyle="round,pad=0.4", fc="#ff6ad5", alpha=0.28, ec="#ff6ad5"))
-        if i < len(labels)-1:
-            ax2.arrow(x[i]+0.5, 0.5, x[i+1]-x[i]-1.0, 0, head_width=0.1, head_length=0.2, fc="white", ec="white", length_includes_head=True)
-    ax2.axis("off")
-    st.pyplot(fig2)
-
-# SIMULATOR
-elif page == "Simulator":
-    st.markdown("## 🎛️ Quantum Circuit Simulator")
-    st.caption("Applies **Hadamard** to each qubit and measures. Uses the current key length if available.")
-    if "qrng_bits" in st.session_state and st.session_state.qrng_bits:
-        nq = len(st.session_state.qrng_bits)
-        st.write(f"Using **{nq} qubits** (synced with your generated key).")
-    else:
-        nq = st.slider("Number of qubits", 3, 12, 6, key="nq_sim")
-        st.info("Tip: Generate a key to auto-sync qubit count here.")
-    qc = example_circuit(nq)
-    try:
-        fig = qc.draw(output="mpl")
-        st.pyplot(fig)
-    except Exception:
-        st.code(qc.draw(output="text"), language="text")
-
+# ---------- Interactive pages ----------
+# Fragments: their own widgets rerun only the page body, not nav/CSS/routing
 # GENERATOR
-elif page == "Generator":
+@st.fragment
+def _generator_page():
     st.markdown("## 🔐 Quantum Key Generator")
     key_size = st.radio("Key Size (bits)", [16, 32, 64, 128], horizontal=True)
     if st.button(f"Generate {key_size}-bit Quantum Key"):
-        bits = qrng_bits(key_size)
-        st.session_state.qrng_bits = bits
+        b = qrng_bytes(key_size)
+        st.session_state.qrng_bytes = b
+        st.session_state.qrng_bits = bits_str(b, key_size)
+        # Classical sample of the same length for Compare, fixed until the next key
+        st.session_state.crng_bytes = bits_to_bytes(crng_bits(key_size))
         st.success("Quantum random bits generated and synced across Simulator, Tests, Compare, and Real-World.")
 
     if "qrng_bits" in st.session_state and st.session_state.qrng_bits:
         bits = st.session_state.qrng_bits
+        b = st.session_state.qrng_bytes
         st.code(bits, language="text")
-        b = bits_to_bytes(bits)
-        st.write("**Integer:**", int(bits, 2))
+        st.write("**Integer:**", int.from_bytes(b, "big"))
         st.write("**HEX:**", b.hex())
         st.write("**Base64:**", base64.urlsafe_b64encode(b).decode())
 
 # COMPARE
-elif page == "Compare":
+@st.fragment
+def _compare_page():
     st.markdown("## ⚖️ Quantum vs Classical RNG")
     if "qrng_bits" not in st.session_state or not st.session_state.qrng_bits:
         st.warning("⚠️ Generate quantum bits in the Generator first.")
     else:
         q_bits = st.session_state.qrng_bits
-        c_bits = crng_bits(len(q_bits))
+        q_bytes = st.session_state.qrng_bytes
+        n = len(q_bits)
+        c_bytes = st.session_state.crng_bytes
         st.markdown("### What & How")
         st.markdown("""
         - **What:** Bit balance (0s vs 1s) for **Quantum** vs **Classical** sequences of the **same length**.
         - **How:** Count frequencies and plot percentages. Both should be ~50/50 ideally.
         - **Why Quantum is better in principle:** Classical PRNG is algorithmic and reproducible if the seed/state is known; QRNG outcomes come from physical measurement and are **not** seed-predictable.
         """)
-        q0, q1 = frequency_test(q_bits)
-        c0, c1 = frequency_test(c_bits)
-        qH = entropy(q_bits); cH = entropy(c_bits)
-        qchi, qp = chi_square_01(q_bits)
-        cchi, cp = chi_square_01(c_bits)
-        fig, ax = plt.subplots()
-        w = 0.35
-        ax.bar([0-w/2, 1-w/2], [q0/len(q_bits)*100, q1/len(q_bits)*100], w, label="Quantum")
-        ax.bar([0+w/2, 1+w/2], [c0/len(c_bits)*100, c1/len(c_bits)*100], w, label="Classical")
-        ax.set_ylabel("Percentage (%)"); ax.set_title("Distribution of 0s vs 1s"); ax.legend()
-        st.pyplot(fig)
+        qs, cs = compute_stats(q_bytes, n), compute_stats(c_bytes, n)
+        q0, q1, qH, qchi, qp = qs["zeros"], qs["ones"], qs["entropy"], qs["chi2"], qs["p"]
+        c0, c1, cH, cchi, cp = cs["zeros"], cs["ones"], cs["entropy"], cs["chi2"], cs["p"]
+        st.pyplot(_compare_fig(n, q0, c0))
         st.markdown("### Result & Interpretation")
         st.write(f"- **Quantum:** {q0} zeros, {q1} ones | Entropy ≈ **{qH:.3f}**, χ²={qchi:.2f}, p={qp:.3f}")
         st.write(f"- **Classical:** {c0} zeros, {c1} ones | Entropy ≈ **{cH:.3f}**, χ²={cchi:.2f}, p={cp:.3f}")
@@ -235,18 +172,21 @@ elif page == "Compare":
                 "Even if both look balanced here, only QRNG is non-seed-based and thus fundamentally unpredictable.")
 
 # TESTS
-elif page == "Tests":
+@st.fragment
+def _tests_page():
     st.markdown("## 🧪 Randomness Tests")
     if "qrng_bits" not in st.session_state or not st.session_state.qrng_bits:
         st.warning("⚠️ Generate quantum bits in the Generator first.")
     else:
         bits = st.session_state.qrng_bits
+        packed = st.session_state.qrng_bytes
         n = len(bits)
         st.code(bits, language="text")
-        z, o = frequency_test(bits)
-        r_obs, r_exp = runs_test(bits)
-        H = entropy(bits)
-        chi2, p = chi_square_01(bits)
+        stats = compute_stats(packed, n)
+        z, o = stats["zeros"], stats["ones"]
+        r_obs, r_exp = stats["runs"], stats["runs_expected"]
+        H = stats["entropy"]
+        chi2, p = stats["chi2"], stats["p"]
         c1, c2 = st.columns(2)
         with c1:
             st.markdown(f"**Frequency:** 0s = {z}, 1s = {o} (expected ≈ {n/2:.1f} each)")
@@ -281,16 +221,16 @@ elif page == "Tests":
                 "are consistent with high-quality randomness.")
 
 # REAL-WORLD
-elif page == "Real-World":
+@st.fragment
+def _realworld_page():
     st.markdown("## 🌐 Real-World Applications & Demos")
     st.caption("All demos below use the currently generated QRNG key (synced).")
 
     if "qrng_bits" not in st.session_state or not st.session_state.qrng_bits:
         st.warning("⚠️ Generate a quantum key first (Generator).")
     else:
-        bits = st.session_state.qrng_bits
-        b = bits_to_bytes(bits)
-        nbits = len(bits)
+        b = st.session_state.qrng_bytes
+        nbits = len(st.session_state.qrng_bits)
 
         st.markdown("### 🔑 API / Session Token")
         st.caption("Base64URL-encoded raw quantum bytes. Use for bearer/CSRF/reset tokens.")
@@ -319,6 +259,98 @@ elif page == "Real-World":
             digest = hmac.new(b, msg.encode(), hashlib.sha256).hexdigest()
             st.code(digest, language="text")
 
+# ---------- Navigation & pages ----------
+# One radio widget instead of a button per page; only the selected page body runs
+PAGES = ["Home","Theory","Simulator","Generator","Compare","Tests","Real-World","FAQ","Contact"]
+page = st.radio("Page", PAGES, horizontal=True, label_visibility="collapsed", key="page")
+
+# HOME
+if page == "Home":
+    st.markdown("## ⚛️ QRNG — Quantum Random Number Generator")
+    st.caption("Design a basic QRNG using **superposition** (Hadamard) and **measurement** to generate random bits.")
+    st.markdown('<div class="card"><h3>Overview</h3>'
+                '<p>• Generate **quantum random bits** (not algorithmic pseudo-random)<br>'
+                '• Visualize the quantum circuit and core theory<br>'
+                '• Run quick statistical tests (Frequency, Runs, Entropy, Chi-Square)<br>'
+                '• See practical uses: API tokens, HMAC, UUIDs, OTP</p></div>', unsafe_allow_html=True)
+    
+    st.markdown("#### 🔁 Process Flow")
+    st.image(_home_flow_png())
+
+    st.markdown('<div class="grid">', unsafe_allow_html=True)
+    c1, c2 = st.columns(2)
+    with c1:
+        st.markdown('<div class="card"><h4>Why Quantum?</h4>'
+                    '<p class="small">Classical RNGs are algorithmic (seeded), hence *pseudo-random*. '
+                    'Quantum randomness is rooted in measurement uncertainty — intrinsically unpredictable.</p></div>',
+                    unsafe_allow_html=True)
+    with c2:
+        st.markdown('<div class="card"><h4>What You Can Show</h4>'
+                    '<p class="small">• Generate keys of 16/32/64/128 bits<br>'
+                    '• Visual circuit & theory<br>'
+                    '• Quick tests proving balance & entropy<br>'
+                    '• Real-world integrations in security workflows</p></div>',
+                    unsafe_allow_html=True)
+
+# THEORY
+elif page == "Theory":
+    st.markdown("## 📚 Theory")
+    left, right = st.columns([1,1], gap="large")
+    with left:
+        st.markdown('<div class="card"><h4>Core Concepts</h4>', unsafe_allow_html=True)
+        st.markdown("""
+        - **Superposition:** Hadamard gate prepares qubits with equal amplitudes → 50/50 outcomes.
+        - **Measurement:** Collapses each qubit to 0 or 1 **unpredictably**.
+        - **Independence:** Apply H on each qubit; measure all; concatenate bits.
+        - **Extractor (prod use):** Optional step to remove bias if needed.
+        """)
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    with right:
+        st.markdown('<div class="card"><h4>Visualization</h4>', unsafe_allow_html=True)
+        nq = st.slider("Number of qubits (illustration)", 3, 12, 6, key="nq_theory")
+        png = _circuit_png(clamp_qubits(nq))
+        if png is not None:
+            st.image(png)
+        else:
+            st.code(cached_circuit(clamp_qubits(nq)).draw(output="text"), language="text")
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    st.markdown("#### 🧠 Concept Snapshot")
+    st.image(_concept_png())
+
+# SIMULATOR
+elif page == "Simulator":
+    st.markdown("## 🎛️ Quantum Circuit Simulator")
+    st.caption("Applies **Hadamard** to each qubit and measures. Uses the current key length if available.")
+    if "qrng_bits" in st.session_state and st.session_state.qrng_bits:
+        nq = len(st.session_state.qrng_bits)
+        st.write(f"Using **{nq} qubits** (synced with your generated key).")
+    else:
+        nq = st.slider("Number of qubits", 3, 12, 6, key="nq_sim")
+        st.info("Tip: Generate a key to auto-sync qubit count here.")
+    png = _circuit_png(clamp_qubits(nq))
+    if png is not None:
+        st.image(png)
+    else:
+        st.code(cached_circuit(clamp_qubits(nq)).draw(output="text"), language="text")
+
+# GENERATOR
+elif page == "Generator":
+    _generator_page()
+
+# COMPARE
+elif page == "Compare":
+    _compare_page()
+
+# TESTS
+elif page == "Tests":
+    _tests_page()
+
+# REAL-WORLD
+elif page == "Real-World":
+    _realworld_page()
+
 # FAQ
 elif page == "FAQ":
     st.markdown("## ❓ Frequently Asked Questions")
@@ -0,0 +1,39 @@
+# bitstats.py
+# Randomness statistics on packed bits (8 bits/byte, big-endian, leading pad bits zero).
+# Pure Python, shared by app.py and compare.py.
+import math
+
+# Ones per byte value; bytes.translate + sum keeps the fallback loop in C
+_POPCOUNT = bytes(bin(i).count("1") for i in range(256))
+
+def _popcount_lut(x: int) -> int:
+    return sum(x.to_bytes((x.bit_length() + 7)//8, "big").translate(_POPCOUNT))
+
+# POPCNT via int.bit_count on Python 3.10+, chosen once at import
+_popcount = int.bit_count if hasattr(int, "bit_count") else _popcount_lut
+
+def frequency_test(packed: bytes, n_bits: int):
+    ones = _popcount(int.from_bytes(packed, "big"))
+    return n_bits - ones, ones
+
+def runs_test(packed: bytes, n_bits: int):
+    if not n_bits: return 0, 0.0
+    x = int.from_bytes(packed, "big")
+    # bit i of x ^ (x >> 1) is set where bits i and i+1 differ; drop the top bit (no neighbour)
+    transitions = _popcount((x ^ (x >> 1)) & ((1 << (n_bits - 1)) - 1))
+    runs = 1 + transitions
+    expected = (2*n_bits-1)/3
+    return runs, expected
+
+def entropy_from_counts(zeros: int, ones: int):
+    total = zeros + ones
+    if ones in (0, total): return 0.0
+    p = ones/total
+    return -(p*math.log2(p) + (1-p)*math.log2(1-p))
+
+def chi_square_from_counts(zeros: int, ones: int):
+    total = zeros + ones
+    if total == 0: return 0.0, 1.0
+    # 2 bins with E = n/2: sum (O-E)^2/E reduces to (zeros-ones)^2/n, 1 degree of freedom
+    chi2 = (zeros - ones)**2 / total
+    return chi2, math.erfc(math.sqrt(chi2/2))  # chi-square survival function, 1 dof
@@ -1,54 +1,59 @@
-from collections import Counter
-import matplotlib.pyplot as plt
-from scipy.stats import chisquare
+import numpy as np
+import secrets
 from qrng import generate_random_bits as qrng_bits
-from classical_rng import generate_random_bits as crng_bits
+from bitstats import chi_square_from_counts
 
 N_BITS = 32       # bits per sample (keep ≤ 29 for quantum backend, but safe wrapper allows bigger)
 N_SAMPLES = 100   # number of random numbers generated
 
-def frequency_test(samples):
-    """Count frequency of 0s and 1s in bitstrings."""
-    zeros, ones = 0, 0
-    for s in samples:
-        c = Counter(s)
-        zeros += c.get("0", 0)
-        ones += c.get("1", 0)
-    total = zeros + ones
-    return zeros, ones, total
+def crng_bit_matrix(n_samples, n_bits):
+    """All classical samples at once: (n_samples, n_bits) array of 0/1 from the OS CSPRNG."""
+    raw = np.frombuffer(secrets.token_bytes((n_samples * n_bits + 7) // 8), dtype=np.uint8)
+    return np.unpackbits(raw, count=n_samples * n_bits).reshape(n_samples, n_bits)
+
+def to_bit_matrix(samples):
+    """Stack equal-length '0'/'1' strings into an (n_samples, n_bits) array of 0/1."""
+    arr = np.frombuffer("".join(samples).encode("ascii"), dtype=np.uint8) - ord("0")
+    return arr.reshape(len(samples), -1)
 
-def chi_square_test(zeros, ones, total):
-    """Perform Chi-square test for uniformity (0s vs 1s)."""
-    expected = [total / 2, total / 2]
-    observed = [zeros, ones]
-    chi2, p_value = chisquare(f_obs=observed, f_exp=expected)
-    return chi2, p_value
+def row_str(row):
+    """Render one sample row back to a '0'/'1' string."""
+    return (row + ord("0")).astype(np.uint8).tobytes().decode("ascii")
+
+def frequency_test(bits):
+    """Count frequency of 0s and 1s in an (n_samples, n_bits) bit array."""
+    ones = int(np.count_nonzero(bits))  # one pass over the whole 2D array
+    total = bits.size
+    zeros = total - ones
+    return zeros, ones, total
 
 if __name__ == "__main__":
     # Generate samples
-    q_samples = [qrng_bits(N_BITS) for _ in range(N_SAMPLES)]
-    c_samples = [crng_bits(N_BITS) for _ in range(N_SAMPLES)]
+    q_samples = to_bit_matrix([qrng_bits(N_BITS) for _ in range(N_SAMPLES)])
+    c_samples = crng_bit_matrix(N_SAMPLES, N_BITS)
 
     # Frequency counts
     q0, q1, q_total = frequency_test(q_samples)
     c0, c1, c_total = frequency_test(c_samples)
 
     # Chi-square tests
-    q_chi2, q_p = chi_square_test(q0, q1, q_total)
-    c_chi2, c_p = chi_square_test(c0, c1, c_total)
+    q_chi2, q_p = chi_square_from_counts(q0, q1)
+    c_chi2, c_p = chi_square_from_counts(c0, c1)
 
     # Print results
     print("=== Quantum Random (QRNG) ===")
-    print("Example bits:", q_samples[0])
+    print("Example bits:", row_str(q_samples[0]))
     print(f"0s: {q0/q_total:.2%}, 1s: {q1/q_total:.2%}")
     print(f"Chi-square: {q_chi2:.3f}, p-value: {q_p:.3f}")
 
     print("\n=== Classical Random (PRNG) ===")
-    print("Example bits:", c_samples[0])
+    print("Example bits:", row_str(c_samples[0]))
     print(f"0s: {c0/c_total:.2%}, 1s: {c1/c_total:.2%}")
     print(f"Chi-square: {c_chi2:.3f}, p-value: {c_p:.3f}")
 
     # Plot bar chart
+    import matplotlib.pyplot as plt
+
     labels = ["0s", "1s"]
     quantum_values = [q0 / q_total * 100, q1 / q_total * 100]
     classical_values = [c0 / c_total * 100, c1 / c_total * 100]
@@ -1,41 +1,98 @@
 # qrng.py
+from __future__ import annotations
+
 import math
-from qiskit import QuantumCircuit, transpile
-from qiskit_aer import AerSimulator
+import os
+import secrets
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+# qiskit / qiskit-aer are imported on first use (Aer path or circuit drawing), not at startup
+if TYPE_CHECKING:
+    from qiskit import QuantumCircuit
 
 # Safe batch limit (avoid "circuit too wide" errors seen on some Aer builds)
 _BATCH_QUBITS = 24
 
+# Run the real H + measure circuit on Aer; otherwise draw fair coin flips from the OS CSPRNG
+USE_AER = os.getenv("QRNG_USE_AER", "0") == "1"
+
+@lru_cache(maxsize=None)
+def _simulator():
+    """One local CPU simulator per process; constructing it is the slow part of a call."""
+    from qiskit_aer import AerSimulator
+    return AerSimulator()
+
 def _build_circuit(n_qubits: int) -> QuantumCircuit:
+    from qiskit import QuantumCircuit
     qc = QuantumCircuit(n_qubits, n_qubits)
     qc.h(range(n_qubits))          # superposition
     qc.measure(range(n_qubits), range(n_qubits))  # measurement
     return qc
 
-def generate_random_bits(n_bits: int) -> str:
+@lru_cache(maxsize=None)
+def _get_compiled(chunk: int) -> QuantumCircuit:
+    """Transpile the H + measure circuit once per qubit count and reuse it."""
+    from qiskit import transpile
+    return transpile(_build_circuit(chunk), _simulator(), optimization_level=0)
+
+def _quantum_bits(n_bits: int) -> str:
     """
     Generate n_bits of quantum random bits using H + measurement on AerSimulator.
-    Batches the circuit so it runs reliably on Windows/Python 3.13 + qiskit-aer.
+    Runs one circuit of at most _BATCH_QUBITS qubits (reliable on Windows/Python 3.13
+    + qiskit-aer) and takes as many shots as needed, instead of one run per chunk.
     """
-    sim = AerSimulator()  # uses local CPU simulator
-    bits_out = []
-    remaining = n_bits
-
-    while remaining > 0:
-        chunk = min(_BATCH_QUBITS, remaining)
-        qc = _build_circuit(chunk)
-        compiled = transpile(qc, sim, optimization_level=0)
-        job = sim.run(compiled, shots=1)      # one sample is enough; each qubit measured once
-        result = job.result()
-        # 'counts' includes a single bitstring like '101010' for shots=1
-        counts = result.get_counts()
-        bitstring = next(iter(counts.keys()))
-        bits_out.append(bitstring[::-1])  # reverse to match qubit->classical order
-        remaining -= chunk
-
-    return "".join(bits_out)[:n_bits]
+    nq = min(_BATCH_QUBITS, n_bits)
+    shots = math.ceil(n_bits / nq)
+    compiled = _get_compiled(nq)
+    job = _simulator().run(compiled, shots=shots, memory=True)   # each shot measures every qubit once
+    result = job.result()
+    # raw per-shot bitstrings, no counts histogram; reverse each to match qubit->classical order
+    return "".join(b[::-1] for b in result.get_memory(compiled))[:n_bits]
+
+def _fast_bytes(n_bits: int) -> bytes:
+    """
+    Same distribution as measuring H|0> on each qubit (independent fair bits),
+    without paying the simulator cost. Leading pad bits are zeroed.
+    """
+    b = bytearray(secrets.token_bytes((n_bits + 7)//8))
+    pad = -n_bits % 8
+    if pad:
+        b[0] &= 0xFF >> pad
+    return bytes(b)
+
+def bits_str(b: bytes, n_bits: int) -> str:
+    """Render packed big-endian bytes as an n_bits-long '0'/'1' string (for display)."""
+    if n_bits <= 0:
+        return ""
+    return bin(int.from_bytes(b, "big"))[2:].zfill(n_bits)
+
+def generate_random_bytes(n_bits: int) -> bytes:
+    """Return n_bits random bits packed 8 per byte, big-endian (the bitstring's integer value)."""
+    if n_bits <= 0:
+        return b""
+    if USE_AER:
+        return int(_quantum_bits(n_bits), 2).to_bytes((n_bits + 7)//8, "big")
+    return _fast_bytes(n_bits)
+
+def generate_random_bits(n_bits: int) -> str:
+    """Return n_bits random bits; set QRNG_USE_AER=1 to sample them from the Aer circuit."""
+    if n_bits <= 0:
+        return ""
+    if USE_AER:
+        return _quantum_bits(n_bits)
+    return bits_str(_fast_bytes(n_bits), n_bits)
+
+def clamp_qubits(n: int) -> int:
+    """Qubit count actually used for an example circuit of size n."""
+    return max(1, min(n, _BATCH_QUBITS))
 
 def example_circuit(n: int) -> QuantumCircuit:
     """Return a small circuit (for drawing in the Theory page)."""
-    n = max(1, min(n, _BATCH_QUBITS))
-    return _build_circuit(n)
+    return _build_circuit(clamp_qubits(n))
+
+# Key sizes offered by the app are 16/32/64/128 bits, i.e. 16- or 24-qubit circuits;
+# transpile them up front so the first Generator click doesn't pay for it.
+if USE_AER and os.getenv("QRNG_WARM", "1") == "1":
+    for _n in (16, 32, 64, 128):
+        _get_compiled(min(_n, _BATCH_QUBITS))